@@ -1,32 +1,56 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import sys
 import time
+import queue
+import atexit
+import asyncio
+import collections
 import logging
 import logging.handlers
 import argparse
+import orjson
 import uvicorn
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Optional
 
 # --- FastAPI Imports ---
 from fastapi import FastAPI, Request, Response, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, FileResponse, StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # --- Database Imports ---
-import psycopg2
-import psycopg2.extras
+import psycopg
+from psycopg.conninfo import make_conninfo
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
 
 # --- Configuration ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_PATH = os.path.join(BASE_DIR, "index.html")
 LOG_FILE = '/var/log/npbc_monitor.log'
+# Hands the conninfo to uvicorn worker processes, which re-import this module
+DB_CONNINFO_ENV = 'NPBC_MONITOR_DB_CONNINFO'
+DB_POOL_MIN_CONN = 4
+DB_POOL_MAX_CONN = 20
+LOG_BATCH_MAX_ROWS = 1000
+LOG_BATCH_WAIT_TIME = 0.2  # seconds
+LOG_BUFFER_MAX_ROWS = 50000  # /log answers 503 beyond this while the DB is down
+LOG_COPY_MIN_ROWS = 16  # smaller batches go through executemany instead
+PARTITION_CHECK_INTERVAL = 3600  # seconds
+STREAM_CHUNK_ROWS = 500
+INFO_CACHE_TTL = 1.0  # seconds
 
 # --- Pydantic Models ---
 class BurnerLogSchema(BaseModel):
-    SwVer: str
+    # Validated up front: rows are only written later, in a shared batch.
+    # "Date" stays a string and is parsed by Postgres on both insert paths.
+    SwVer: str = Field(max_length=50)
     Date: str
     Mode: int
     State: int
@@ -75,35 +99,68 @@ def setup_logging():
     file_handler = logging.handlers.WatchedFileHandler(LOG_FILE)
     file_handler.setFormatter(formatter)
 
+    # Request paths only enqueue the record; a listener thread does the file I/O
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
     # Clear existing handlers to avoid duplication
     if root_logger.hasHandlers():
         root_logger.handlers.clear()
-    root_logger.addHandler(file_handler)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
 
 # --- Database Utilities ---
 
-def get_db_connection(args):
+def build_db_conninfo(args):
+    # Built once at startup; the pool and --init_db both connect with it.
+    return make_conninfo(
+        host=args.db_host,
+        port=args.db_port,
+        dbname=args.db_name,
+        user=args.db_user,
+        password=args.db_password
+    )
+
+def get_db_connection():
     try:
-        conn = psycopg2.connect(
-            host=args.db_host,
-            port=args.db_port,
-            dbname=args.db_name,
-            user=args.db_user,
-            password=args.db_password
-        )
-        return conn
-    except psycopg2.OperationalError as e:
-        logging.error(f"Could not connect to DB: {e}")
+        return psycopg.connect(db_conninfo)
+    except psycopg.OperationalError as e:
+        logging.error("Could not connect to DB: %s", e)
         sys.exit(1)
 
-def initialize_database(args):
-    conn = get_db_connection(args)
+def create_db_pool():
+    # Opened (and closed) by the app lifespan, inside the running event loop.
+    return AsyncConnectionPool(
+        db_conninfo,
+        # Prepare every statement on first use; the driver caches the
+        # plan per connection, so repeated inserts/queries skip parsing.
+        kwargs=dict(prepare_threshold=0),
+        min_size=DB_POOL_MIN_CONN,
+        max_size=DB_POOL_MAX_CONN,
+        open=False
+    )
+
+def initialize_database():
+    conn = get_db_connection()
     try:
         with conn.cursor() as cur:
-            # 1. Create the main log table
+            # 1. A plain (pre-partitioning) BurnerLogs is renamed out of the way,
+            #    together with its indexes and trigger, and re-attached below.
+            cur.execute("""SELECT relkind = 'r' FROM pg_class WHERE oid = to_regclass('"BurnerLogs"')""")
+            row = cur.fetchone()
+            legacy_table = bool(row and row[0])
+            if legacy_table:
+                logging.info("Converting BurnerLogs to a partitioned table...")
+                cur.execute('DROP TRIGGER IF EXISTS "BurnerLogs_hourly_stats" ON "BurnerLogs"')
+                cur.execute('ALTER TABLE "BurnerLogs" RENAME TO "BurnerLogs_legacy"')
+                cur.execute('ALTER INDEX "BurnerLogs_pkey" RENAME TO "BurnerLogs_legacy_pkey"')
+                cur.execute('ALTER INDEX IF EXISTS "BurnerLogs_Date_idx" RENAME TO "BurnerLogs_legacy_Date_idx"')
+
+            # 2. Create the main log table, partitioned by month
             cur.execute("""
                 CREATE TABLE IF NOT EXISTS "BurnerLogs" (
-                    "Timestamp" TIMESTAMP NOT NULL PRIMARY KEY,
+                    "Timestamp" TIMESTAMP NOT NULL DEFAULT clock_timestamp() PRIMARY KEY,
                     "SwVer" VARCHAR(50) NOT NULL,
                     "Date" TIMESTAMP NOT NULL,
                     "Mode" INTEGER NOT NULL,
@@ -128,10 +185,58 @@ def initialize_database(args):
                     "TBMP" REAL NOT NULL,
                     "PBMP" REAL NOT NULL,
                     "KTYPE" REAL NOT NULL
-                )
+                ) PARTITION BY RANGE ("Timestamp")
+            """)
+
+            # 3. Monthly partitions. The pre-partitioning table (if any) becomes the
+            #    partition holding everything up to the end of the current month.
+            if legacy_table:
+                cur.execute("""
+                    ALTER TABLE "BurnerLogs" ATTACH PARTITION "BurnerLogs_legacy"
+                    FOR VALUES FROM (MINVALUE) TO (date_trunc('month', LOCALTIMESTAMP) + INTERVAL '1 month')
+                """)
+            cur.execute("""
+                CREATE OR REPLACE FUNCTION "BurnerLogs_ensure_partitions"() RETURNS void AS $$
+                DECLARE
+                    month_start TIMESTAMP;
+                BEGIN
+                    -- Current and next month
+                    FOR month_start IN
+                        SELECT generate_series(date_trunc('month', LOCALTIMESTAMP),
+                                               date_trunc('month', LOCALTIMESTAMP) + INTERVAL '1 month',
+                                               INTERVAL '1 month')
+                    LOOP
+                        -- Skip months an existing partition (e.g. "BurnerLogs_legacy") already
+                        -- covers; only a real CREATE takes the lock on the parent table.
+                        CONTINUE WHEN EXISTS (
+                            SELECT 1
+                            FROM pg_inherits i
+                            CROSS JOIN LATERAL pg_get_expr(
+                                (SELECT c.relpartbound FROM pg_class c WHERE c.oid = i.inhrelid),
+                                i.inhrelid
+                            ) AS bound
+                            WHERE i.inhparent = '"BurnerLogs"'::regclass
+                              AND COALESCE(substring(bound FROM 'FROM \\(''([^'']*)''\\)')::timestamp, '-infinity') <= month_start
+                              AND COALESCE(substring(bound FROM 'TO \\(''([^'']*)''\\)')::timestamp, 'infinity') > month_start
+                        );
+                        EXECUTE format(
+                            'CREATE TABLE %I PARTITION OF "BurnerLogs" FOR VALUES FROM (%L) TO (%L)',
+                            'BurnerLogs_' || to_char(month_start, 'YYYY_MM'),
+                            month_start,
+                            month_start + INTERVAL '1 month'
+                        );
+                    END LOOP;
+                END;
+                $$ LANGUAGE plpgsql
+            """)
+            cur.execute('SELECT "BurnerLogs_ensure_partitions"()')
+
+            # 4. Index "Date" for the range scans and ordering in getStats/getInfo
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS "BurnerLogs_Date_idx" ON "BurnerLogs" ("Date")
             """)
 
-            # 2. Create the summary cache table
+            # 5. Create the summary cache table
             cur.execute("""
                 CREATE TABLE IF NOT EXISTS "MonthlyStats" (
                     "Month" DATE NOT NULL PRIMARY KEY,
@@ -139,7 +244,39 @@ def initialize_database(args):
                 )
             """)
 
-            # 3. Seed/Backfill the cache
+            # 6. Create the hourly cache table
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS "HourlyStats" (
+                    "Hour" TIMESTAMP NOT NULL PRIMARY KEY,
+                    "FFWorkTime" INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+
+            # 7. Keep HourlyStats current from every INSERT/COPY into BurnerLogs.
+            #    "Timestamp" is assigned by the server, so the roll-up happens here
+            #    on the statement's transition table rather than in the log writer.
+            cur.execute("""
+                CREATE OR REPLACE FUNCTION "BurnerLogs_update_hourly_stats"() RETURNS trigger AS $$
+                BEGIN
+                    INSERT INTO "HourlyStats" ("Hour", "FFWorkTime")
+                    SELECT date_trunc('hour', "Timestamp"), SUM("FFWorkTime")
+                    FROM new_rows
+                    GROUP BY 1
+                    ON CONFLICT ("Hour") DO UPDATE
+                    SET "FFWorkTime" = "HourlyStats"."FFWorkTime" + EXCLUDED."FFWorkTime";
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql
+            """)
+            cur.execute('DROP TRIGGER IF EXISTS "BurnerLogs_hourly_stats" ON "BurnerLogs"')
+            cur.execute("""
+                CREATE TRIGGER "BurnerLogs_hourly_stats"
+                AFTER INSERT ON "BurnerLogs"
+                REFERENCING NEW TABLE AS new_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION "BurnerLogs_update_hourly_stats"()
+            """)
+
+            # 8. Seed/Backfill the caches
             logging.info("Seeding MonthlyStats cache from existing logs...")
             cur.execute("""
                 INSERT INTO "MonthlyStats" ("Month", "FFWorkTime")
@@ -150,35 +287,56 @@ def initialize_database(args):
                 ON CONFLICT ("Month") DO NOTHING
             """)
 
+            logging.info("Seeding HourlyStats cache from existing logs...")
+            cur.execute("""
+                INSERT INTO "HourlyStats" ("Hour", "FFWorkTime")
+                SELECT date_trunc('hour', "Timestamp"), SUM("FFWorkTime")
+                FROM "BurnerLogs"
+                GROUP BY 1
+                ON CONFLICT ("Hour") DO NOTHING
+            """)
+
             conn.commit()
             logging.info("Database initialized.")
 
     except Exception as e:
-        logging.error(f"DB Init failed: {e}")
+        logging.error("DB Init failed: %s", e)
         conn.rollback()
     finally:
         conn.close()
 
+async def ensure_log_partitions():
+    """
+    Makes sure BurnerLogs has partitions for the current and the next month.
+    Returns False if the check could not be completed.
+    """
+    try:
+        async with db_pool.connection() as conn, conn.cursor() as cur:
+            await cur.execute('SELECT "BurnerLogs_ensure_partitions"()')
+        return True
+    except Exception as e:
+        logging.error("Failed to create log partitions: %s", e)
+        return False
+
 # Call this at startup or periodically
-def ensure_monthly_stats_up_to_date(conn_args):
+async def ensure_monthly_stats_up_to_date():
     """
     Checks if the previous completed month exists in MonthlyStats.
     If not, it calculates it from BurnerLogs and inserts it.
     """
-    conn = get_db_connection(conn_args)
     try:
-        with conn.cursor() as cur:
+        async with db_pool.connection() as conn, conn.cursor() as cur:
             # 1. Determine the start of the current month and the previous month
-            cur.execute("SELECT date_trunc('month', NOW())::date, date_trunc('month', NOW() - INTERVAL '1 month')::date")
-            current_month_start, prev_month_start = cur.fetchone()
+            await cur.execute("SELECT date_trunc('month', NOW())::date, date_trunc('month', NOW() - INTERVAL '1 month')::date")
+            current_month_start, prev_month_start = await cur.fetchone()
 
             # 2. Check if previous month exists in Summary
-            cur.execute('SELECT 1 FROM "MonthlyStats" WHERE "Month" = %s', (prev_month_start,))
-            if cur.fetchone() is None:
-                logging.info(f"Caching stats for completed month: {prev_month_start}")
+            await cur.execute('SELECT 1 FROM "MonthlyStats" WHERE "Month" = %s', (prev_month_start,))
+            if await cur.fetchone() is None:
+                logging.info("Caching stats for completed month: %s", prev_month_start)
 
                 # Calculate and Insert (Atomic operation)
-                cur.execute("""
+                await cur.execute("""
                     INSERT INTO "MonthlyStats" ("Month", "FFWorkTime")
                     SELECT date_trunc('month', "Timestamp")::date, SUM("FFWorkTime")
                     FROM "BurnerLogs"
@@ -187,18 +345,180 @@ def ensure_monthly_stats_up_to_date(conn_args):
                     ON CONFLICT ("Month") DO NOTHING
                 """, (prev_month_start, current_month_start))
 
-                conn.commit()
+                await conn.commit()
             else:
                 logging.debug("Monthly stats are up to date.")
     except Exception as e:
-        logging.error(f"Failed to update monthly stats: {e}")
-    finally:
-        conn.close()
+        logging.error("Failed to update monthly stats: %s", e)
+
+# --- Log Ingest Buffer ---
+
+# Burner samples are queued here by log_data and written in batches by log_writer.
+log_buffer = collections.deque()
+log_flush_event = None
+log_writer_stop = None
+
+LOG_COLUMNS = (
+    "SwVer", "Date", "Mode", "State", "Status", "IgnitionFail", "PelletJam",
+    "Tset", "Tboiler", "Flame", "Heater", "DHWPump", "CHPump", "DHW", "BF", "FF", "Fan",
+    "Power", "ThermostatStop", "FFWorkTime", "TDS18", "TBMP", "PBMP", "KTYPE"
+)
+LOG_COLUMNS_SQL = ", ".join(f'"{col}"' for col in LOG_COLUMNS)
+LOG_PLACEHOLDERS_SQL = ", ".join(["%s"] * len(LOG_COLUMNS))
+
+LOG_INSERT_SQL = f'INSERT INTO "BurnerLogs" ({LOG_COLUMNS_SQL}) VALUES ({LOG_PLACEHOLDERS_SQL})'
+LOG_COPY_SQL = f'COPY "BurnerLogs" ({LOG_COLUMNS_SQL}) FROM STDIN'
+
+async def insert_log_rows(rows):
+    # "Timestamp" comes from the column default; HourlyStats is updated by trigger.
+    async with db_pool.connection() as conn, conn.cursor() as cur:
+        # Don't wait for the WAL flush on this transaction only. A server crash
+        # can lose the last ~LOG_BATCH_WAIT_TIME of samples, which is acceptable
+        # for telemetry; everything else keeps the default durable commit.
+        await cur.execute("SET LOCAL synchronous_commit = off")
+        if len(rows) < LOG_COPY_MIN_ROWS:
+            await cur.executemany(LOG_INSERT_SQL, rows)
+        else:
+            async with cur.copy(LOG_COPY_SQL) as copy:
+                for row in rows:
+                    await copy.write_row(row)
+
+# Failures that say nothing about the rows themselves; the batch is kept and retried.
+# BurnerLogs has no CHECK constraints, so CheckViolation means "no partition of
+# relation found for row", i.e. a missing monthly partition.
+LOG_RETRY_ERRORS = (psycopg.OperationalError, PoolTimeout, psycopg.errors.CheckViolation)
+
+async def insert_log_rows_one_by_one(rows):
+    """
+    Fallback for a batch the server rejected: writes each row on its own so
+    only the offending rows are dropped.
+    """
+    for i, row in enumerate(rows):
+        try:
+            await insert_log_rows([row])
+        except LOG_RETRY_ERRORS:
+            log_buffer.extendleft(reversed(rows[i:]))
+            raise
+        except Exception as e:
+            logging.error("Error logging data (row dropped): %s - %r", e, row)
+
+async def flush_log_buffer():
+    """
+    Writes out the buffer. Returns False if rows were put back for a retry.
+    """
+    while log_buffer:
+        batch_size = min(len(log_buffer), LOG_BATCH_MAX_ROWS)
+        rows = [log_buffer.popleft() for _ in range(batch_size)]
+        try:
+            try:
+                await insert_log_rows(rows)
+            except LOG_RETRY_ERRORS:
+                # DB unreachable/busy or partition missing: keep the rows and retry
+                # on the next flush
+                log_buffer.extendleft(reversed(rows))
+                raise
+            except Exception as e:
+                logging.warning("Log batch of %d rows rejected, retrying row by row: %s", len(rows), e)
+                await insert_log_rows_one_by_one(rows)
+        except LOG_RETRY_ERRORS as e:
+            logging.error("Error logging data (%d rows kept for retry): %s", len(log_buffer), e)
+            return False
+    return True
+
+async def log_writer():
+    """
+    Flushes the buffer every LOG_BATCH_WAIT_TIME seconds, or as soon as
+    LOG_BATCH_MAX_ROWS rows are waiting. Drains whatever is left on shutdown.
+    Also keeps next month's BurnerLogs partition in place ahead of time.
+    """
+    next_partition_check = 0.0
+    while not log_writer_stop.is_set():
+        try:
+            await asyncio.wait_for(log_flush_event.wait(), LOG_BATCH_WAIT_TIME)
+        except asyncio.TimeoutError:
+            pass
+        log_flush_event.clear()
+        if time.monotonic() >= next_partition_check and await ensure_log_partitions():
+            next_partition_check = time.monotonic() + PARTITION_CHECK_INTERVAL
+        if not await flush_log_buffer():
+            # Could be a missing partition: check again on the next tick
+            next_partition_check = 0.0
+
+# --- Response Streaming ---
+
+async def json_row_chunks(query, params):
+    """
+    Runs the query on a server-side cursor and yields the rows as a JSON array,
+    one chunk of STREAM_CHUNK_ROWS rows at a time.
+    """
+    async with db_pool.connection() as conn, conn.cursor(name="stream_cur", row_factory=dict_row) as cur:
+        await cur.execute(query, params)
+        # Encode each chunk as one array and strip its brackets. "Date" keeps
+        # its microseconds: it is the exact keyset cursor for the next page.
+        rows = await cur.fetchmany(STREAM_CHUNK_ROWS)
+        yield b"[" + orjson.dumps(rows)[1:-1]
+        while rows := await cur.fetchmany(STREAM_CHUNK_ROWS):
+            yield b"," + orjson.dumps(rows)[1:-1]
+        yield b"]"
+
+async def stream_json_rows(query, params):
+    """
+    Returns a StreamingResponse for the query. The query runs and the first
+    chunk is fetched before the response starts, so DB errors (and pool
+    timeouts) still produce a 500 rather than a truncated 200.
+    """
+    chunks = json_row_chunks(query, params)
+    first_chunk = await chunks.__anext__()
+
+    async def body():
+        # Closing the generator returns the pooled connection as soon as the
+        # client goes away, instead of whenever it gets garbage-collected
+        try:
+            yield first_chunk
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    return StreamingResponse(body(), media_type="application/json")
 
 # --- FastAPI App Setup ---
 
-app = FastAPI(docs_url=None, redoc_url=None)
-app_args = None
+db_conninfo = os.environ.get(DB_CONNINFO_ENV)
+db_pool = None
+
+# Latest getInfo result, shared by all clients polling within INFO_CACHE_TTL
+info_cache = {"time": 0.0, "value": None}
+info_cache_lock = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global db_pool, log_flush_event, log_writer_stop, info_cache_lock
+    # Runs once per worker, after the fork: each worker gets its own pool.
+    if not logging.getLogger().hasHandlers():
+        setup_logging()
+    db_pool = create_db_pool()
+    await db_pool.open()
+    info_cache_lock = asyncio.Lock()
+    log_flush_event = asyncio.Event()
+    log_writer_stop = asyncio.Event()
+    writer_task = asyncio.create_task(log_writer())
+    try:
+        yield
+    finally:
+        log_writer_stop.set()
+        log_flush_event.set()
+        await writer_task
+        if log_buffer:
+            logging.error("Shutting down with %d unwritten log rows", len(log_buffer))
+            for row in log_buffer:
+                logging.error("Dropped unwritten log row: %r", row)
+        await db_pool.close()
+
+app = FastAPI(docs_url=None, redoc_url=None, default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# getStats can be megabytes of highly repetitive JSON; tiny responses aren't worth it
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 # --- Middleware: The Single Logger ---
 @app.middleware("http")
@@ -212,15 +532,6 @@ async def custom_logging_middleware(request: Request, call_next):
     # Get IP (Handling Nginx Proxy Headers)
     client_ip = request.headers.get("x-real-ip") or request.client.host
 
-    # Log Format: "HTTP_Status Method URL Duration"
-    # Example: 200 POST /api/logData 43.11ms
-    msg = "%d %s %s %.2fms" % (
-        response.status_code,
-        request.method,
-        request.url.path,
-        process_time
-    )
-
     if response.status_code < 400:
         level = logging.INFO
     elif response.status_code < 500:
@@ -228,63 +539,108 @@ async def custom_logging_middleware(request: Request, call_next):
     else:
         level = logging.ERROR
 
-    logging.getLogger().log(level, msg, extra={'client_ip': client_ip})
+    # Log Format: "HTTP_Status Method URL Duration"
+    # Example: 200 POST /api/logData 43.11ms
+    logging.getLogger().log(
+        level,
+        "%d %s %s %.2fms",
+        response.status_code,
+        request.method,
+        request.url.path,
+        process_time,
+        extra={'client_ip': client_ip}
+    )
 
     return response
 
+# --- API Queries ---
+
+GET_INFO_SQL = """
+    SELECT "SwVer", "Power", "Flame", "Tset", "Tboiler", "State", "Status", "DHW", "Fan", "DHWPump", "CHPump", "Mode", "TBMP"
+    FROM "BurnerLogs" WHERE "Timestamp" >= NOW() - INTERVAL '1 minute'
+    ORDER BY "Date" DESC LIMIT 1
+"""
+
+GET_STATS_SQL = """
+    SELECT "Timestamp" AS "Date",
+           "Power", "Flame", "Tset", "Tboiler", "DHW", "TDS18", "KTYPE", "TBMP"
+    FROM "BurnerLogs"
+"""
+
+# Combines the fast "MonthlyStats" table with the (at most 744) "HourlyStats"
+# rows of the current month.
+CONSUMPTION_BY_MONTH_SQL = """
+    SELECT to_char("Month", 'YYYY-MM') AS yr_mon, "FFWorkTime" as "FFWork"
+    FROM "MonthlyStats"
+
+    UNION ALL
+
+    SELECT to_char(date_trunc('month', "Hour"), 'YYYY-MM') AS yr_mon, SUM("FFWorkTime") as "FFWork"
+    FROM "HourlyStats"
+    WHERE "Hour" >= date_trunc('month', NOW())
+    GROUP BY date_trunc('month', "Hour")
+
+    ORDER BY yr_mon;
+"""
+
+CONSUMPTION_STATS_SQL = """
+    SELECT
+        hour_bucket as "Timestamp",
+        COALESCE(hs."FFWorkTime", 0) as "FFWorkTime"
+    FROM
+        generate_series(
+            date_trunc('hour', to_timestamp(%s)::timestamp),
+            date_trunc('hour', LOCALTIMESTAMP),
+            '1 hour'
+        ) AS hour_bucket
+    LEFT JOIN "HourlyStats" AS hs
+        ON hs."Hour" = hour_bucket
+    ORDER BY hour_bucket;
+"""
+
 # --- API Routes ---
 
 @app.post("/api/logData")
-def log_data(data: BurnerLogSchema):
-    try:
-        conn = get_db_connection(app_args)
-        with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO "BurnerLogs" (
-                    "Timestamp", "SwVer", "Date", "Mode", "State", "Status", "IgnitionFail", "PelletJam",
-                    "Tset", "Tboiler", "Flame", "Heater", "DHWPump", "CHPump", "DHW", "BF", "FF", "Fan",
-                    "Power", "ThermostatStop", "FFWorkTime", "TDS18", "TBMP", "PBMP", "KTYPE"
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                )
-            """, (
-                datetime.now(), data.SwVer, data.Date, data.Mode, data.State, data.Status,
-                data.IgnitionFail, data.PelletJam, data.Tset, data.Tboiler,
-                data.Flame, data.Heater, data.DHWPump, data.CHPump,
-                data.DHW, data.BF, data.FF, data.Fan, data.Power,
-                data.ThermostatStop, data.FFWorkTime, data.TDS18, data.TBMP,
-                data.PBMP, data.KTYPE
-            ))
-            conn.commit()
-        conn.close()
-        return {"message": "OK"}
-    except Exception as e:
-        logging.error(f"Error logging data: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+async def log_data(data: BurnerLogSchema):
+    if len(log_buffer) >= LOG_BUFFER_MAX_ROWS:
+        raise HTTPException(status_code=503, detail="Log buffer full")
+    log_buffer.append((
+        data.SwVer, data.Date, data.Mode, data.State, data.Status,
+        data.IgnitionFail, data.PelletJam, data.Tset, data.Tboiler,
+        data.Flame, data.Heater, data.DHWPump, data.CHPump,
+        data.DHW, data.BF, data.FF, data.Fan, data.Power,
+        data.ThermostatStop, data.FFWorkTime, data.TDS18, data.TBMP,
+        data.PBMP, data.KTYPE
+    ))
+    if len(log_buffer) >= LOG_BATCH_MAX_ROWS:
+        log_flush_event.set()
+    return {"message": "OK"}
 
 @app.get("/api/getInfo")
-def get_info():
-    conn = get_db_connection(app_args)
-    with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-        cur.execute("""
-            SELECT "SwVer", "Power", "Flame", "Tset", "Tboiler", "State", "Status", "DHW", "Fan", "DHWPump", "CHPump", "Mode", "TBMP"
-            FROM "BurnerLogs" WHERE "Timestamp" >= NOW() - INTERVAL '1 minute'
-            ORDER BY "Date" DESC LIMIT 1
-        """)
-        result = [dict(row) for row in cur.fetchall()]
-    conn.close()
+async def get_info():
+    if time.monotonic() - info_cache["time"] < INFO_CACHE_TTL:
+        return info_cache["value"]
+
+    # Single-flight: concurrent pollers wait for one query instead of each running it
+    async with info_cache_lock:
+        if time.monotonic() - info_cache["time"] < INFO_CACHE_TTL:
+            return info_cache["value"]
+
+        async with db_pool.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(GET_INFO_SQL)
+            result = await cur.fetchall()
+
+        info_cache["value"] = result
+        info_cache["time"] = time.monotonic()
     return result
 
 @app.get("/api/getStats")
-def get_stats(timestamp: Optional[str] = None, limit: int = 7000, page: int = 1):
+async def get_stats(timestamp: Optional[str] = None, after: Optional[str] = None, limit: int = 7000):
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="Invalid limit")
     if limit > 10000: limit = 10000
-    offset = (page - 1) * limit
 
-    query = """
-        SELECT to_char("Timestamp", 'YYYY-MM-DD"T"HH24:MI:SS') AS "Date",
-               "Power", "Flame", "Tset", "Tboiler", "DHW", "ThermostatStop", "TDS18", "KTYPE", "TBMP"
-        FROM "BurnerLogs"
-    """
+    query = GET_STATS_SQL
     params = []
     where_clauses = []
 
@@ -298,50 +654,35 @@ def get_stats(timestamp: Optional[str] = None, limit: int = 7000, page: int = 1)
     else:
         where_clauses.append("\"Date\" >= NOW() - INTERVAL '24 hours'")
 
+    # Keyset pagination: pass the "Date" of the last row of a full page as 'after'.
+    # It is "Timestamp" at full precision, so the boundary row is not repeated.
+    if after:
+        try:
+            where_clauses.append('"Timestamp" > %s')
+            params.append(datetime.fromisoformat(after))
+        except ValueError:
+             raise HTTPException(status_code=400, detail="Invalid cursor")
+
     if where_clauses:
         query += " WHERE " + " AND ".join(where_clauses)
 
-    query += ' ORDER BY "Date" ASC LIMIT %s OFFSET %s'
-    params.extend([limit, offset])
+    query += ' ORDER BY "Timestamp" ASC LIMIT %s'
+    params.append(limit)
 
-    conn = get_db_connection(app_args)
-    try:
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-            cur.execute(query, params)
-            result = [dict(row) for row in cur.fetchall()]
-        return result
-    finally:
-        conn.close()
+    return await stream_json_rows(query, params)
 
 @app.get("/api/getConsumptionByMonth")
-def get_consumption_by_month():
+async def get_consumption_by_month():
     # 1. First, ensure our cache is up to date (lazy check)
-    ensure_monthly_stats_up_to_date(app_args)
-
-    conn = get_db_connection(app_args)
-    with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-        # Combines the fast "MonthlyStats" table with a small query on "BurnerLogs"
-        # for ONLY the current month.
-        query = """
-            SELECT to_char("Month", 'YYYY-MM') AS yr_mon, "FFWorkTime" as "FFWork"
-            FROM "MonthlyStats"
-
-            UNION ALL
-
-            SELECT to_char(date_trunc('month', "Timestamp"), 'YYYY-MM') AS yr_mon, SUM("FFWorkTime") as "FFWork"
-            FROM "BurnerLogs"
-            WHERE "Timestamp" >= date_trunc('month', NOW())
-            GROUP BY date_trunc('month', "Timestamp")
-
-            ORDER BY yr_mon;
-        """
-        cur.execute(query)
-        result = [dict(row) for row in cur.fetchall()]
-    conn.close()
+    await ensure_monthly_stats_up_to_date()
+
+    async with db_pool.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+        await cur.execute(CONSUMPTION_BY_MONTH_SQL)
+        result = await cur.fetchall()
     return result
 
 @app.get("/api/getConsumptionStats")
-def get_consumption_stats(timestamp: Optional[str] = None):
+async def get_consumption_stats(timestamp: Optional[str] = None):
     try:
         if timestamp:
             timestamp_sec = int(timestamp)
@@ -350,31 +691,26 @@ def get_consumption_stats(timestamp: Optional[str] = None):
     except ValueError:
          timestamp_sec = int((datetime.now().timestamp()) - (24 * 3600))
 
-    start_time = datetime.fromtimestamp(timestamp_sec)
-
-    conn = get_db_connection(app_args)
-    with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-        cur.execute("""
-            SELECT
-                to_char(hour_bucket, 'YYYY-MM-DD"T"HH24:MI:SS') as "Timestamp",
-                COALESCE(SUM(bl."FFWorkTime"), 0) as "FFWorkTime"
-            FROM
-                generate_series(
-                    date_trunc('hour', %s::timestamp),
-                    date_trunc('hour', NOW()),
-                    '1 hour'
-                ) AS hour_bucket
-            LEFT JOIN "BurnerLogs" AS bl
-                ON bl."Timestamp" >= hour_bucket AND bl."Timestamp" < hour_bucket + interval '1 hour'
-            GROUP BY hour_bucket
-            ORDER BY hour_bucket;
-        """, (start_time,))
-        result = [dict(row) for row in cur.fetchall()]
-    conn.close()
+    async with db_pool.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+        await cur.execute(CONSUMPTION_STATS_SQL, (timestamp_sec,))
+        result = await cur.fetchall()
     return result
 
 # --- Static Files & Routing ---
 
+ALLOWED_ROOT_FILES = frozenset({"favicon.ico", "manifest.json", "robots.txt", "asset-manifest.json"})
+LOGO_FILE_RE = re.compile(r"logo.*\.png")
+
+# Resolved once at startup instead of stat()-ing on every request. BASE_DIR also
+# holds the server itself, so it is not mounted wholesale with StaticFiles.
+ROOT_FILES = {
+    name: os.path.join(BASE_DIR, name)
+    for name in os.listdir(BASE_DIR)
+    if (name in ALLOWED_ROOT_FILES or LOGO_FILE_RE.fullmatch(name))
+    and os.path.isfile(os.path.join(BASE_DIR, name))
+}
+INDEX_EXISTS = os.path.isfile(INDEX_PATH)
+
 # 1. Mount static folder
 static_dir = os.path.join(BASE_DIR, "static")
 if os.path.exists(static_dir):
@@ -382,25 +718,20 @@ if os.path.exists(static_dir):
 
 @app.get("/")
 async def serve_root():
-    index_path = os.path.join(BASE_DIR, "index.html")
-    if os.path.exists(index_path):
-        return FileResponse(index_path)
+    if INDEX_EXISTS:
+        return FileResponse(INDEX_PATH)
     return Response("Index not found", status_code=404)
 
 @app.get("/{file_name}")
 async def serve_root_files(file_name: str):
-    allowed = ["favicon.ico", "manifest.json", "robots.txt", "asset-manifest.json"]
-
-    if file_name in allowed or (file_name.startswith("logo") and file_name.endswith(".png")):
-        file_path = os.path.join(BASE_DIR, file_name)
-        if os.path.exists(file_path):
-            # Return correct media type for favicon
-            media_type = "image/x-icon" if file_name == "favicon.ico" else None
-            return FileResponse(file_path, media_type=media_type)
+    file_path = ROOT_FILES.get(file_name)
+    if file_path:
+        # Return correct media type for favicon
+        media_type = "image/x-icon" if file_name == "favicon.ico" else None
+        return FileResponse(file_path, media_type=media_type)
 
-    index_path = os.path.join(BASE_DIR, "index.html")
-    if os.path.exists(index_path):
-        return FileResponse(index_path)
+    if INDEX_EXISTS:
+        return FileResponse(INDEX_PATH)
 
     return Response("Not Found", status_code=404)
 
@@ -410,6 +741,8 @@ def parse_arguments():
     parser = argparse.ArgumentParser(description="NPBC Monitor Server")
     parser.add_argument("--host", default="localhost")
     parser.add_argument("--port", type=int, default=8088, help="Run on the given port")
+    # Each worker has its own DB pool (up to DB_POOL_MAX_CONN), log buffer and getInfo cache
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
     parser.add_argument("--db_host", default="localhost")
     parser.add_argument("--db_port", default=5432)
     parser.add_argument("--db_name", default="npbc_db")
@@ -420,22 +753,27 @@ def parse_arguments():
 
 if __name__ == "__main__":
     args = parse_arguments()
-    app_args = args
+    db_conninfo = build_db_conninfo(args)
+    os.environ[DB_CONNINFO_ENV] = db_conninfo
 
     setup_logging()
 
     if args.init_db:
-        initialize_database(args)
+        initialize_database()
         sys.exit(0)
 
-    logging.info(f"Script running from: {BASE_DIR}")
-    logging.info(f"Starting FastAPI on port {args.port}...")
+    logging.info("Script running from: %s", BASE_DIR)
+    logging.info("Starting FastAPI on port %d with %d worker(s)...", args.port, args.workers)
 
     # We rely entirely on our custom middleware for request logging.
+    # Workers need an import string rather than the app object.
     uvicorn.run(
-        app,
+        "npbc_monitor:app",
         host=args.host,
         port=args.port,
+        workers=args.workers,
+        loop="uvloop",
+        http="httptools",
         log_config=None,
         access_log=False,
         forwarded_allow_ips="*"